@@ -1,11 +1,94 @@
+import asyncio
+import csv
+import functools
+import hashlib
+import hmac
+import logging
 import os
-from datetime import datetime
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
 from typing import List, Tuple
 
-import pandas as pd
 import reflex as rx
 from rxconfig import config  # keep if you have rxconfig.py; safe to leave
 
+log = logging.getLogger(__name__)
+
+
+# ---------- Auth config ----------
+
+# Both secrets below follow one policy: required when REFLEX_ENV_MODE is prod;
+# in dev (and for tooling imports) a random per-process value is used instead,
+# with a warning, so the module always imports without production secrets.
+_IS_PROD = os.environ.get("REFLEX_ENV_MODE", "dev") == "prod"
+
+# SHA-256 of the access keyword (64 hex chars). Generate with:
+#   python -c "import hashlib; print(hashlib.sha256(b'<keyword>').hexdigest())"
+_pw_sha256 = os.environ.get("APP_PW_SHA256", "")
+if _pw_sha256:
+    try:
+        STORED_HASH = bytes.fromhex(_pw_sha256)
+    except ValueError:
+        STORED_HASH = b""
+    if len(STORED_HASH) != hashlib.sha256().digest_size:
+        raise RuntimeError(
+            "APP_PW_SHA256 is invalid; export the 64-char hex SHA-256 of the access keyword"
+        )
+else:
+    if _IS_PROD:
+        raise RuntimeError(
+            "APP_PW_SHA256 is not set; export the hex SHA-256 of the access keyword"
+        )
+    _dev_keyword = secrets.token_urlsafe(8)
+    log.warning(
+        "APP_PW_SHA256 is not set; using random dev keyword %r for this process",
+        _dev_keyword,
+    )
+    STORED_HASH = hashlib.sha256(_dev_keyword.encode("utf-8")).digest()
+
+# HMAC key for auth cookies, shared by all workers and kept across restarts.
+# Rotating it revokes every outstanding token.
+AUTH_KEY = os.environ.get("APP_AUTH_KEY", "").encode("utf-8")
+if not AUTH_KEY:
+    if _IS_PROD:
+        raise RuntimeError("APP_AUTH_KEY is not set; it is required in prod")
+    log.warning(
+        "APP_AUTH_KEY is not set; using a random per-process key, so logins "
+        "won't survive a reload or work across workers"
+    )
+    AUTH_KEY = secrets.token_bytes(32)
+
+# Auth tokens (and their cookie) expire this many seconds after login
+AUTH_MAX_AGE = 24 * 60 * 60
+
+
+def _sign(payload: str) -> str:
+    """Return the hex HMAC-SHA256 of payload under AUTH_KEY."""
+    return hmac.new(AUTH_KEY, payload.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _make_auth_token() -> str:
+    """Return a fresh signed token of the form <nonce>.<issued_at>.<hmac>."""
+    payload = f"{secrets.token_urlsafe(16)}.{int(time.time())}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def _verify_auth_token(value: str) -> bool:
+    """Check a <nonce>.<issued_at>.<hmac> token's signature and AUTH_MAX_AGE expiry."""
+    payload, _, sig = value.rpartition(".")
+    # Compare as bytes: compare_digest rejects non-ASCII str from a tampered cookie
+    if not payload or not hmac.compare_digest(sig.encode("utf-8"), _sign(payload).encode("ascii")):
+        return False
+    issued_at = payload.rpartition(".")[2]
+    if not issued_at.isdigit():
+        return False
+    return 0 <= time.time() - int(issued_at) <= AUTH_MAX_AGE
+
 
 # ---------- CSV loaders ----------
 
@@ -14,10 +97,21 @@ def _csv_path(filename: str) -> str:
     return os.path.join(os.path.dirname(__file__), filename)
 
 
+# Matches every character except ASCII digits
+_NONDIGIT_RE = re.compile(r"[^0-9]")
+
+
 def _format_phone_number(phone: str) -> str:
     """Format phone number from 1234567890 to (123) 456-7890"""
+    n = len(phone)
+    # Fast paths: bare 10 ASCII digits, or already formatted
+    if n == 10 and phone.isascii() and phone.isdigit():
+        return f"({phone[:3]}) {phone[3:6]}-{phone[6:]}"
+    if n == 14 and phone[0] == "(" and phone[4:6] == ") " and phone[9] == "-":
+        return phone
+
     # Remove any non-digit characters
-    digits = ''.join(filter(str.isdigit, phone))
+    digits = _NONDIGIT_RE.sub("", phone)
     
     # Check if it's a 10-digit US phone number
     if len(digits) == 10:
@@ -27,62 +121,182 @@ def _format_phone_number(phone: str) -> str:
     return phone
 
 
+# Cell values pandas.read_csv treats as missing by default
+_NA_VALUES = frozenset({
+    "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+
 def _read_csv_safe(path: str) -> Tuple[List[str], List[List[str]]]:
     """
-    Read a CSV and return (headers, rows) as strings, with NaNs -> "".
-    If file missing/invalid, raise an exception.
+    Read a CSV and return (headers, rows) as strings, with missing/NA cells -> "".
+    If file missing/invalid (including rows with more fields than headers),
+    raise an exception.
     """
-    # Read CSV with all columns as strings to prevent numeric conversion
-    df = pd.read_csv(path, dtype=str)
-    # Convert headers to strings
-    headers = [str(col) for col in df.columns.tolist()]
-    # Convert all values to strings, replacing NaN with ""
-    rows = []
-    for _, row in df.iterrows():
-        string_row = [str(cell) if pd.notna(cell) and cell != 'nan' else "" for cell in row]
-        rows.append(string_row)
+    # utf-8-sig drops the BOM that Excel "CSV UTF-8" exports prepend
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        headers = next(reader)
+        width = len(headers)
+        rows = []
+        for row in reader:
+            # Skip blank lines, like read_csv
+            if not row:
+                continue
+            if len(row) > width:
+                raise ValueError(
+                    f"Expected {width} fields in line {reader.line_num}, saw {len(row)}"
+                )
+            # Pad short rows so every row matches the headers
+            row += [""] * (width - len(row))
+            rows.append(["" if cell in _NA_VALUES else cell for cell in row])
     return headers, rows
 
 
-def load_schedule_from_csv() -> Tuple[List[str], List[List[str]]]:
-    """Load schedule data; fallback to default rows if it fails."""
+def _freeze_rows(rows: List[List[str]]) -> Tuple[Tuple[str, ...], ...]:
+    """Convert rows to tuples, interning cells so repeated values share one str."""
+    return tuple(tuple(map(sys.intern, row)) for row in rows)
+
+
+@functools.lru_cache(maxsize=1)
+def _parse_schedule() -> Tuple[Tuple[str, ...], Tuple[Tuple[str, ...], ...]]:
+    """Parse schedule.csv once per process; raises on failure (not cached)."""
+    headers, rows = _read_csv_safe(_csv_path("schedule.csv"))
+    log.debug("Loaded %d rows with %d columns from schedule.csv", len(rows), len(headers))
+    log.debug("Columns: %s", headers)
+    return tuple(headers), _freeze_rows(rows)
+
+
+@functools.lru_cache(maxsize=1)
+def _parse_members() -> Tuple[Tuple[str, ...], Tuple[Tuple[str, ...], ...]]:
+    """Parse members.csv once per process; raises on failure (not cached)."""
+    headers, rows = _read_csv_safe(_csv_path("members.csv"))
+
+    # Format phone numbers in Contact column if it exists
+    if "Contact" in headers:
+        contact_index = headers.index("Contact")
+        for row in rows:
+            if contact_index < len(row) and row[contact_index]:
+                row[contact_index] = _format_phone_number(row[contact_index])
+
+    log.debug("Loaded %d rows with %d columns from members.csv", len(rows), len(headers))
+    log.debug("Columns: %s", headers)
+    return tuple(headers), _freeze_rows(rows)
+
+
+def load_schedule_from_csv() -> Tuple[Tuple[str, ...], Tuple[Tuple[str, ...], ...]]:
+    """Load schedule data; fallback to default rows if it fails.
+
+    Successful parses are shared by all sessions as immutable tuples; a
+    failed load is retried on the next call.
+    """
     try:
-        headers, rows = _read_csv_safe(_csv_path("schedule.csv"))
-        print(f"Loaded {len(rows)} rows with {len(headers)} columns from schedule.csv")
-        print(f"Columns: {headers}")
-        return headers, rows
+        return _parse_schedule()
     except Exception as e:
-        print(f"Error loading schedule.csv: {e}")
+        log.warning("Error loading schedule.csv: %s", e)
         # Fallback data (Date, Event)
         return (
-            ["Date", "Event"],
-            [
-                ["09/12/2025", "Opening CG Gathering"],
-                ["09/19/2025", "Discussion"],
-                ["Error", "Could not load schedule.csv - using fallback data"],
-            ],
+            ("Date", "Event"),
+            (
+                ("09/12/2025", "Opening CG Gathering"),
+                ("09/19/2025", "Discussion"),
+                ("Error", "Could not load schedule.csv - using fallback data"),
+            ),
         )
 
 
-def load_members_from_csv() -> Tuple[List[str], List[List[str]]]:
-    """Load members data; fallback to empty if missing."""
+def load_members_from_csv() -> Tuple[Tuple[str, ...], Tuple[Tuple[str, ...], ...]]:
+    """Load members data; fallback to empty if missing.
+
+    Successful parses are shared by all sessions as immutable tuples; a
+    failed load is retried on the next call.
+    """
     try:
-        headers, rows = _read_csv_safe(_csv_path("members.csv"))
-        
-        # Format phone numbers in Contact column if it exists
-        if "Contact" in headers:
-            contact_index = headers.index("Contact")
-            for row in rows:
-                if contact_index < len(row) and row[contact_index]:
-                    row[contact_index] = _format_phone_number(row[contact_index])
-        
-        print(f"Loaded {len(rows)} rows with {len(headers)} columns from members.csv")
-        print(f"Columns: {headers}")
-        return headers, rows
+        return _parse_members()
     except Exception as e:
-        print(f"Error loading members.csv: {e}")
+        log.warning("Error loading members.csv: %s", e)
         # sensible fallback (empty table)
-        return (["Name", "Role"], [])
+        return (("Name", "Role"), ())
+
+
+# ---------- Prayer request storage ----------
+
+_DB_PATH = os.path.join(os.path.dirname(__file__), "prayer_requests.db")
+# Pre-SQLite storage: one mm_dd_YYYY_HH_MM_SS[_xxxx].txt file per request
+_LEGACY_DIR = os.path.join(os.path.dirname(__file__), "prayer_requests")
+
+# Read stored requests with:
+#   sqlite3 PrayerApp/prayer_requests.db "SELECT ts, body FROM requests ORDER BY ts"
+#
+# One shared autocommit connection in WAL mode, opened on first write so that
+# importing this module (reflex compile/export, tooling) doesn't create the
+# database; the lock serializes writers coming from asyncio.to_thread workers.
+_DB = None
+_DB_LOCK = threading.Lock()
+
+
+def _legacy_requests() -> List[Tuple[str, str]]:
+    """Return (ts, body) for each legacy .txt request, oldest first."""
+    try:
+        names = sorted(os.listdir(_LEGACY_DIR))
+    except OSError:
+        return []
+    requests = []
+    for name in names:
+        if not name.endswith(".txt"):
+            continue
+        path = os.path.join(_LEGACY_DIR, name)
+        # Best effort per file: one bad file must not block the import
+        try:
+            try:
+                # Filenames hold local time; store UTC like new requests
+                when = datetime.strptime(name[:19], "%m_%d_%Y_%H_%M_%S").astimezone(timezone.utc)
+            except ValueError:
+                when = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                requests.append((when.isoformat(timespec="seconds"), f.read()))
+        except OSError as e:
+            log.warning("Skipping legacy prayer request %s: %s", path, e)
+    requests.sort()
+    return requests
+
+
+def _get_db() -> sqlite3.Connection:
+    """Open the database on first use (caller holds _DB_LOCK).
+
+    When the requests table is first created, the legacy .txt requests are
+    imported into it once; the files themselves are left in place.
+    """
+    global _DB
+    if _DB is None:
+        db = sqlite3.connect(_DB_PATH, isolation_level=None, check_same_thread=False)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("BEGIN IMMEDIATE")
+            exists = db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requests'"
+            ).fetchone()
+            if not exists:
+                db.execute("CREATE TABLE requests (ts TEXT NOT NULL, body TEXT NOT NULL)")
+                legacy = _legacy_requests()
+                db.executemany("INSERT INTO requests (ts, body) VALUES (?, ?)", legacy)
+                if legacy:
+                    log.info("Imported %d legacy prayer requests into %s", len(legacy), _DB_PATH)
+            db.execute("COMMIT")
+        except BaseException:
+            # Closing without COMMIT rolls back any open transaction
+            db.close()
+            raise
+        _DB = db
+    return _DB
+
+
+def _write_request(text: str) -> None:
+    """Append a prayer request to the database (run off the event loop)."""
+    ts = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with _DB_LOCK:
+        _get_db().execute("INSERT INTO requests (ts, body) VALUES (?, ?)", (ts, text))
 
 
 # ---------- App State ----------
@@ -92,13 +306,13 @@ class State(rx.State):
     # Auth
     password: str = ""
     show_error: bool = False
-    is_authenticated: bool = False
+    auth_token: str = rx.Cookie("", name="auth_token", max_age=AUTH_MAX_AGE, same_site="strict")
 
     # Schedules/Members
     schedule_headers: List[str] = []
-    schedule_rows: List[List[str]] = []
+    schedule_cells: List[str] = []  # row-major, len(schedule_headers) per row
     members_headers: List[str] = []
-    members_rows: List[List[str]] = []
+    members_cells: List[str] = []  # row-major, len(members_headers) per row
 
     # UI toggles
     show_members: bool = False
@@ -108,9 +322,14 @@ class State(rx.State):
     prayer_request_text: str = ""
 
     # ---- Derived / helpers ----
+    # Not cached: validity depends on the clock, not just on auth_token
+    @rx.var(cache=False)
+    def is_authenticated(self) -> bool:
+        return _verify_auth_token(self.auth_token)
+
     @rx.var
     def members_count(self) -> int:
-        return len(self.members_rows)
+        return len(self.members_cells) // max(len(self.members_headers), 1)
 
     # ---- Toggles ----
     def toggle_members(self):
@@ -125,24 +344,14 @@ class State(rx.State):
     def set_prayer_request(self, text: str):
         self.prayer_request_text = text
 
-    def submit_prayer_request(self):
+    async def submit_prayer_request(self):
         text = self.prayer_request_text.strip()
         if not text:
             return rx.toast.error("Please enter a prayer request.")
 
         try:
-            # Create directory
-            dir_path = os.path.join(os.path.dirname(__file__), "prayer_requests")
-            os.makedirs(dir_path, exist_ok=True)
-
-            # Generate timestamped filename: mm_dd_YYYY_HH_MM_SS.txt
-            now = datetime.now()
-            filename = now.strftime("%m_%d_%Y_%H_%M_%S.txt")
-            filepath = os.path.join(dir_path, filename)
-
             # Save
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(text)
+            await asyncio.to_thread(_write_request, text)
 
             # Clear textarea
             self.prayer_request_text = ""
@@ -152,15 +361,15 @@ class State(rx.State):
 
     # ---- Data loading on mount ----
     def load_data_on_mount(self):
-        if not self.schedule_headers or not self.schedule_rows:
+        if not self.schedule_headers or not self.schedule_cells:
             h, r = load_schedule_from_csv()
-            self.schedule_headers = h
-            self.schedule_rows = r
+            self.schedule_headers = list(h)
+            self.schedule_cells = [cell for row in r for cell in row]
 
-        if not self.members_headers or not self.members_rows:
+        if not self.members_headers or not self.members_cells:
             h, r = load_members_from_csv()
-            self.members_headers = h
-            self.members_rows = r
+            self.members_headers = list(h)
+            self.members_cells = [cell for row in r for cell in row]
 
     # ---- Auth handlers ----
     def set_password(self, value: str):
@@ -169,9 +378,11 @@ class State(rx.State):
             self.show_error = False
 
     def submit_password(self):
-        # change this keyword to whatever you want
-        if self.password == "2ndstreet":
-            self.is_authenticated = True
+        # Constant-time compare against the stored keyword hash
+        digest = hashlib.sha256(self.password.encode("utf-8")).digest()
+        if hmac.compare_digest(digest, STORED_HASH):
+            self.auth_token = _make_auth_token()
+            self.password = ""
             return rx.redirect("/home")
         else:
             self.show_error = True
@@ -181,13 +392,15 @@ class State(rx.State):
             return self.submit_password()
 
     def logout(self):
-        self.is_authenticated = False
+        self.auth_token = ""
         self.password = ""
         self.show_error = False
         return rx.redirect("/")
 
     def check_auth_and_redirect(self):
-        if not self.is_authenticated:
+        if not _verify_auth_token(self.auth_token):
+            # Drop expired/invalid tokens so the server copy can't outlive the cookie
+            self.auth_token = ""
             return rx.redirect("/")
         return None
 
@@ -237,26 +450,28 @@ def index() -> rx.Component:
     )
 
 
-def _table_from(headers: List[str], rows: List[List[str]]) -> rx.Component:
-    """Helper to render a responsive table from headers/rows."""
+@rx.memo
+def _table_from(headers: rx.Var[List[str]], cells: rx.Var[List[str]]) -> rx.Component:
+    """
+    Helper to render a responsive table from headers and flat row-major cells.
+    Laid out as a plain CSS grid of divs: no rx.table theming and no table
+    semantics for assistive tech (rows aren't grouped, so no ARIA roles).
+    Memoized via rx.memo (call with keywords): it skips re-rendering only when
+    a parent re-renders with unchanged props, not when the props are swapped.
+    """
+    cell_style = dict(
+        padding="0.5rem 0.75rem",
+        border_bottom="1px solid var(--gray-a5)",
+        white_space="nowrap",
+    )
+    # repeat(0, auto) is invalid CSS, so use one column until headers load
+    n_cols = rx.cond(headers.length() > 0, headers.length(), 1)
     return rx.box(
-        rx.table.root(
-            rx.table.header(
-                rx.table.row(
-                    rx.foreach(headers, lambda h: rx.table.column_header_cell(h))
-                )
-            ),
-            rx.table.body(
-                rx.foreach(
-                    rows,
-                    lambda row: rx.table.row(
-                        rx.foreach(
-                            row,
-                            lambda cell: rx.table.cell(cell, white_space="nowrap"),
-                        )
-                    ),
-                )
-            ),
+        rx.box(
+            rx.foreach(headers, lambda h: rx.box(rx.text(h, weight="bold"), **cell_style)),
+            rx.foreach(cells, lambda cell: rx.box(cell, **cell_style)),
+            display="grid",
+            grid_template_columns=f"repeat({n_cols}, auto)",
         ),
         width="100%",
         overflow_x="auto",
@@ -304,8 +519,8 @@ def home() -> rx.Component:
                 # Conditional table display
                 rx.cond(
                     State.show_members,
-                    _table_from(State.members_headers, State.members_rows),
-                    _table_from(State.schedule_headers, State.schedule_rows),
+                    _table_from(headers=State.members_headers, cells=State.members_cells),
+                    _table_from(headers=State.schedule_headers, cells=State.schedule_cells),
                 ),
                 spacing="5",
                 align="center",